@@ -2,13 +2,21 @@ import networkx as nx
 from math import *
 import haversine as hs
 from typing import *
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import pairwise_distances_argmin
 import numpy as np
 from numpy.typing import NDArray
 from dataclasses import *
-from segments import Point, Segments,Region  
+from segments import Point, Segments,Region, iter_segment_chunks
 from haversine import haversine, Unit
 from monuments import select_monuments_in_region, Monuments
+from itertools import count
+
+_graph_versions = count(1)  # Every built graph gets a new version number
+MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes used to process segments out of core
+GRAPH_SEGMENT_BYTES = 290  # Memory used by make_graph for every segment (measured with tracemalloc)
+EPOCHS = 3  # Passes over the segments file to fit the clusters out of core
+REFINEMENTS = 20  # Maximum passes over the segments file to refine the clusters out of core
 
 def make_graph(segments: Segments, clusters: int, epsilon: float, region: Region, start: Point, filename: str) -> nx.Graph:
     """Make a graph from the segments."""
@@ -28,12 +36,6 @@ def make_graph(segments: Segments, clusters: int, epsilon: float, region: Region
     clustering.fit(seg_array)
     cluster_labels = clustering.labels_
 
-    # Create graph with cluster centroids as nodes
-    G = nx.Graph()
-    centroids = clustering.cluster_centers_
-    for num, centroid in enumerate(centroids):
-        G.add_node(num, pos=(centroid[0], centroid[1]), type="others") 
-
     centroids_adj: dict[tuple[int, int], int] = {}
     # Count adjacencies between points from the same segment and different centroid
     for index in range(0, len(cluster_labels), 2):
@@ -43,7 +45,96 @@ def make_graph(segments: Segments, clusters: int, epsilon: float, region: Region
             if (x, y) not in centroids_adj.keys():
                 centroids_adj[(x, y)] = 0
             centroids_adj[(x, y)] += 1
-    
+
+    return _build_graph(clustering.cluster_centers_, centroids_adj, epsilon, region, start, filename)
+
+def make_graph_out_of_core(segments_filename: str, clusters: int, epsilon: float, region: Region, start: Point,
+                           filename: str, memory_budget: int = MEMORY_BUDGET, epochs: int = EPOCHS) -> nx.Graph:
+    """Make a graph from the segments of a file without loading it in memory.
+    The file is read in chunks that fit in memory_budget bytes: the clustering starts
+    from a sample of the file, it is updated chunk by chunk during some epochs, the
+    centroids are refined and then the adjacencies are counted in a last pass.
+    The result approximates the one of make_graph."""
+
+    chunk_size = _chunk_size(memory_budget, clusters)
+
+    # Initial centroids from a sample of the whole file, as chunks may cover only a part of the region
+    sample = _sample_points(segments_filename, chunk_size)
+    initial = KMeans(n_clusters=clusters, random_state=0, n_init="auto").fit(sample)
+
+    # Clustering on points, updated with each chunk
+    # (no reassignment of small clusters: chunks of a sorted file would move them around)
+    clustering = MiniBatchKMeans(n_clusters=clusters, init=initial.cluster_centers_, n_init=1,
+                                 reassignment_ratio=0, random_state=0)
+    for _ in range(epochs):
+        for chunk in iter_segment_chunks(segments_filename, chunk_size):
+            clustering.partial_fit(chunk.reshape(-1, 2))
+    centroids = _refine_centroids(segments_filename, chunk_size, clustering.cluster_centers_)
+
+    centroids_adj: dict[tuple[int, int], int] = {}
+    # Count adjacencies between points from the same segment and different centroid
+    for chunk in iter_segment_chunks(segments_filename, chunk_size):
+        cluster_labels = pairwise_distances_argmin(chunk.reshape(-1, 2), centroids).reshape(-1, 2)
+        cluster_labels = cluster_labels[cluster_labels[:, 0] != cluster_labels[:, 1]]
+        cluster_labels.sort(axis=1)
+        pairs, counts = np.unique(cluster_labels, axis=0, return_counts=True)
+        for (x, y), value in zip(pairs, counts):
+            centroids_adj[(x, y)] = centroids_adj.get((x, y), 0) + int(value)
+
+    return _build_graph(centroids, centroids_adj, epsilon, region, start, filename)
+
+def _refine_centroids(segments_filename: str, chunk_size: int, centroids: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Improve the centroids with k-means iterations over the whole file, read in chunks:
+    each point is assigned to its nearest centroid and every centroid moves to the mean of its points."""
+    centroids = centroids.copy()
+    for _ in range(REFINEMENTS):
+        sums = np.zeros_like(centroids)
+        counts = np.zeros(len(centroids), dtype=np.int64)
+        for chunk in iter_segment_chunks(segments_filename, chunk_size):
+            points = chunk.reshape(-1, 2)
+            labels = pairwise_distances_argmin(points, centroids)
+            np.add.at(sums, labels, points)
+            counts += np.bincount(labels, minlength=len(centroids))
+        # Centroids without points stay where they are
+        moved = centroids.copy()
+        moved[counts > 0] = sums[counts > 0] / counts[counts > 0, None]
+        if np.allclose(moved, centroids, rtol=0, atol=1e-9):
+            break
+        centroids = moved
+    return centroids
+
+def _sample_points(segments_filename: str, chunk_size: int) -> NDArray[np.float64]:
+    """Uniform random sample of at most chunk_size segments of the file, as an array of points.
+    Every segment gets a random key and those with the smallest keys are kept."""
+    rng = np.random.default_rng(0)
+    sample = np.empty((0, 4), dtype=np.float64)
+    keys = np.empty(0, dtype=np.float64)
+    for chunk in iter_segment_chunks(segments_filename, chunk_size):
+        sample = np.concatenate((sample, chunk))
+        keys = np.concatenate((keys, rng.random(len(chunk))))
+        if len(keys) > chunk_size:
+            kept = np.argpartition(keys, chunk_size)[:chunk_size]
+            sample, keys = sample[kept], keys[kept]
+    return sample.reshape(-1, 2)
+
+def _chunk_size(memory_budget: int, clusters: int) -> int:
+    """Number of segments per chunk so that processing a chunk fits in memory_budget bytes.
+    Per segment: the text lines, the array of points, the labels and the distances to every centroid."""
+    segment_bytes = 128 + 4 * 8 + 2 * 8 + 2 * clusters * 8
+    chunk_size = memory_budget // segment_bytes
+    if chunk_size < clusters:
+        raise ValueError("The memory budget is too small for this number of clusters.")
+    return chunk_size
+
+def _build_graph(centroids: NDArray[np.float64], centroids_adj: dict[tuple[int, int], int], epsilon: float,
+                 region: Region, start: Point, filename: str) -> nx.Graph:
+    """Build the graph from the cluster centroids and the adjacencies between them."""
+
+    # Create graph with cluster centroids as nodes
+    G = nx.Graph(version=next(_graph_versions), region=astuple(region))
+    for num, centroid in enumerate(centroids):
+        G.add_node(num, pos=(centroid[0], centroid[1]), type="others") 
+
     # Valid adjacencies
     for (x, y), value in centroids_adj.items():
         if value > 0:
@@ -1,9 +1,11 @@
 from yogi import read
+from math import ceil
 from segments import *
 from graphmaker import *
 from viewer import *
 from monuments import * 
 from routes import *
+from routecache import cached_routes
 
 # Catalonia's approx bounding box Region
 CAT_BOUNDS = {
@@ -36,6 +38,16 @@ def _in_selected_region(region: Region, point: Point) -> bool:
       max_lon = max(region.bottom_left.lon, region.top_right.lon)
       return (min_lat <= point.lat <= max_lat and min_lon <= point.lon <= max_lon)
 
+def _out_of_core(segments_count: int, memory_budget: int) -> bool:
+      '''Check if loading all the segments, and drawing or clustering them,
+      needs more memory than the budget, so they have to be processed in parts'''
+      return segments_count * (SEGMENT_BYTES + max(LINE_BYTES, GRAPH_SEGMENT_BYTES)) > memory_budget
+
+def _preview_step(segments_count: int, memory_budget: int) -> int:
+      '''One of every how many segments can be drawn
+      so that their lines fit in the memory budget'''
+      return max(1, ceil(segments_count * LINE_BYTES / memory_budget))
+
 def _read_cluster_num() -> int:
       '''Read an input.
       If it is valid, return the value.
@@ -71,7 +83,9 @@ def _read_str() -> str:
             else:
                   print("We need a filename, the input can't be empty!")
 
-def main() -> None:
+def main(memory_budget: int = MEMORY_BUDGET) -> None:
+      '''Run the program, processing the segments in parts
+      if they do not fit in memory_budget bytes'''
       print("Hello! Wellcome to our hiking routes app!")
       print("Here, you'll be able to discover and explore the the hidden trails and medieval gems of any region.")
       print("To get started and enhance your experience we need you to give us some information.")
@@ -93,7 +107,15 @@ def main() -> None:
       print("Otherwise, don't worry. We'll create a new file with the name you introduce.")
       segment_filename = _read_str()
       txt_segment_filename = segment_filename + ".txt"
-      seg = get_segments(reg_OSM, txt_segment_filename) # Segments list to process
+      download_segments(reg_OSM, txt_segment_filename)
+      segments_count = count_segments(txt_segment_filename)
+      out_of_core = _out_of_core(segments_count, memory_budget)
+      if out_of_core:
+            print("The segments file is too big to be loaded at once, it will be processed in parts.")
+            # Only a part of the segments is drawn so that the map fits in memory
+            seg = iter_segments(txt_segment_filename, _preview_step(segments_count, memory_budget))
+      else:
+            seg = get_segments(reg_OSM, txt_segment_filename) # Segments list to process
 
       print("Write another filename to get the representation of the segments in your region of interest.")
       seg_rep_filename = _read_str()
@@ -125,15 +147,20 @@ def main() -> None:
       kml_filename = map_filename + ".kml"
 
       print("Thank you! We are processing your details. This may take a few minutes, please don't turn off your device.")
-      global_graph, selected_monuments = make_graph(seg, clusters, epsilon, reg, start, txt_monuments_filename)
-      route_graph = create_route_graph(global_graph, 'start', selected_monuments)
+      if out_of_core:
+            global_graph, selected_monuments = make_graph_out_of_core(txt_segment_filename, clusters, epsilon, reg, start, txt_monuments_filename, memory_budget)
+      else:
+            global_graph, selected_monuments = make_graph(seg, clusters, epsilon, reg, start, txt_monuments_filename)
+      result = cached_routes(global_graph, start, selected_monuments)
 
       print("The routes to all the accessible monuments have been created:")
-      find_routes(route_graph, Point(start_lat, start_lon), selected_monuments)
+      print_routes(result.routes)
 
       print("In a few minutes you'll be ready to see your maps!")
-      export_PNG(route_graph, png_filename, reg)
-      export_KML(route_graph, kml_filename)
+      with open(png_filename, "wb") as file:
+            file.write(result.png)
+      with open(kml_filename, "wb") as file:
+            file.write(result.kml)
       print("Your maps are ready! You can find them in the same directory as this script.")
       print("Enjoy your hiking experience!")
 
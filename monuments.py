@@ -12,25 +12,26 @@ class Monument:
     location: Point
 
 Monuments: TypeAlias = list[Monument]
+CATALUNYA_MEDIEVAL_URL = "https://www.catalunyamedieval.es"  # Catalunya Medieval website
 
 def _download_monuments(filename) -> None:
     """Download monuments from Catalunya Medieval."""
     urls = [
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-militar/castells/","castell"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-militar/fortificacions-depoca-carlina/","epoca-carlina"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-militar/muralles/", "muralles"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-militar/torres/", "torre"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-civil/cases-fortes/", "casa-forta"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-civil/palaus/", "palau"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-civil/ponts/", "pont"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-civil/torres-colomer/", "torre-colomer"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/basiliques/", "basilica"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/catedrals/", "catedral"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/ermites/", "ermita"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/esglesies/", "esglesia"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/esglesies-fortificades/", "esglesia-fortificada"),
-        ("https://www.catalunyamedieval.es/edificacions-de-caracter-religios/monestirs/", "monestir"),
-        ("https://www.catalunyamedieval.es/altres-llocs-dinteres/", "altres-llocs-dinteres")
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-militar/castells/","castell"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-militar/fortificacions-depoca-carlina/","epoca-carlina"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-militar/muralles/", "muralles"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-militar/torres/", "torre"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-civil/cases-fortes/", "casa-forta"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-civil/palaus/", "palau"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-civil/ponts/", "pont"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-civil/torres-colomer/", "torre-colomer"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/basiliques/", "basilica"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/catedrals/", "catedral"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/ermites/", "ermita"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/esglesies/", "esglesia"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/esglesies-fortificades/", "esglesia-fortificada"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/edificacions-de-caracter-religios/monestirs/", "monestir"),
+        (f"{CATALUNYA_MEDIEVAL_URL}/altres-llocs-dinteres/", "altres-llocs-dinteres")
     ]
     for url, key in urls:  
         response = requests.get(url)
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Any, Callable, TypeAlias
+import time
+import networkx as nx
+from segments import Point, Region
+from monuments import Monuments
+from graphmaker import _find_nearest_node, create_route_graph
+from routes import Routes, shortest_routes
+from viewer import render_PNG, render_KML
+
+CACHE_SIZE = 128  # Maximum number of cached queries
+CACHE_TTL = 3600.0  # Seconds a cached query stays valid
+
+RegionKey: TypeAlias = tuple[tuple[float, float], tuple[float, float]]  # Region as a tuple
+Key: TypeAlias = tuple[RegionKey, int, Any, frozenset[str]]  # Region, graph version, start node, monuments
+
+
+@dataclass
+class CachedRoutes:
+    """Finished routes from a start node with their rendered maps"""
+
+    route_graph: nx.Graph
+    routes: Routes
+    png: bytes
+    kml: bytes
+
+
+class RouteCache:
+    """Bounded LRU cache of route queries with a time to live.
+    Every entry belongs to one graph version of a region; when a query arrives
+    with a newer graph of the region, the entries of its older graphs are discarded.
+    Graphs of other regions (and queries on older graphs) do not remove anything."""
+
+    def __init__(self, max_size: int = CACHE_SIZE, ttl: float = CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        if max_size < 1:
+            raise ValueError("The cache size must be at least 1.")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._versions: dict[RegionKey, int] = {}  # Newest graph version of every region
+        self._entries: OrderedDict[Key, tuple[float, CachedRoutes]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Key) -> CachedRoutes | None:
+        """Return the entry of the key if it is still valid, None otherwise."""
+        self._check_version(key[0], key[1])
+        entry = self._entries.get(key)
+        if entry is None or self._clock() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Key, value: CachedRoutes) -> None:
+        """Store the value, evicting the least recently used entry if full."""
+        self._check_version(key[0], key[1])
+        self._entries[key] = (self._clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all the entries (counters are kept)."""
+        self._entries.clear()
+        self._versions.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counters and current size of the cache."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _check_version(self, region: RegionKey, version: int) -> None:
+        """Drop the entries of the older graphs of the region if it has been rebuilt."""
+        if version > self._versions.get(region, version - 1):
+            self._versions[region] = version
+            for key in [key for key in self._entries if key[0] == region and key[1] < version]:
+                del self._entries[key]
+
+
+ROUTE_CACHE = RouteCache()  # Shared cache used by default
+
+
+def cached_routes(graph: nx.Graph, start: Point, selected_monuments: Monuments,
+                  cache: RouteCache = ROUTE_CACHE) -> CachedRoutes:
+    """Get the routes from the start point to the monuments using the cache.
+    The maps are centered on the region the graph was made for.
+    The start point is snapped to its nearest node of the graph, so every start
+    sharing that node gets the same routes and maps (with the start marker on the node).
+    The result is a copy, so changing it does not affect the cached one."""
+    start_node = _find_nearest_node(start, graph)
+    key = (graph.graph["region"], graph.graph["version"], start_node, frozenset(m.name for m in selected_monuments))
+    result = cache.get(key)
+    if result is None:
+        result = _compute_routes(graph, start_node, selected_monuments)
+        cache.put(key, result)
+    return deepcopy(result)
+
+
+def _compute_routes(graph: nx.Graph, start_node: Any, selected_monuments: Monuments) -> CachedRoutes:
+    """Create the route graph from the given node and render its maps."""
+    G = graph.copy()
+    if "start" in G:
+        G.remove_node("start")
+    lat, lon = G.nodes[start_node]["pos"]
+    start = Point(lat, lon)
+    G.add_node("start", pos=start, type="start")
+    G.add_edge("start", start_node)
+
+    route_graph = create_route_graph(G, "start", selected_monuments)
+    routes = shortest_routes(route_graph, start, selected_monuments)
+    bottom_left, top_right = graph.graph["region"]
+    region = Region(Point(*bottom_left), Point(*top_right))
+    return CachedRoutes(route_graph, routes, render_PNG(route_graph, region), render_KML(route_graph))
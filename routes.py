@@ -14,19 +14,35 @@ from numpy.typing import NDArray
 from dataclasses import *
 
 
+Routes: TypeAlias = list[tuple[Monument, list]]  # Monument and its path of nodes
+
+
 def find_routes(graph: nx.Graph, start: Point, endpoints: Monuments) -> None:
     """Find the shortest route between the starting point and all the endpoints."""
 
+    print_routes(shortest_routes(graph, start, endpoints))
+
+
+def shortest_routes(graph: nx.Graph, start: Point, endpoints: Monuments) -> Routes:
+    """Compute the shortest route between the starting point and every endpoint."""
+
     start_node = _find_nearest_node(start, graph)
-    any_route = False
+    routes: Routes = []
     for monument in endpoints: 
         end_node = _find_nearest_node(monument.location, graph)
         route = _find_shortest_path(graph, start_node, end_node)
         if route is not None:
-            any_route = True
-            print(f"Monument: {monument.name}, Route: {route}") 
+            routes.append((monument, route))
+    return routes
+
+
+def print_routes(routes: Routes) -> None:
+    """Print the route to every monument, or a warning if there is none."""
+
+    for monument, route in routes:
+        print(f"Monument: {monument.name}, Route: {route}") 
         
-    if not any_route:
+    if not routes:
         print("There is not any monument accesible in the region from the starting point.")
 
 
@@ -4,6 +4,9 @@ import gpxpy
 import requests
 import staticmap
 import os
+import numpy as np
+from numpy.typing import NDArray
+from itertools import islice
 from datetime import datetime
 from haversine import haversine, Unit 
 
@@ -40,6 +43,9 @@ class Segment_to_clean:
 Data: TypeAlias = list[Segment_to_clean]  # List: segment{point, time - point,time}
 Segments: TypeAlias = list[Segment]  # Point,point, time
 VALID_DISTANCE = 0.1  # Maximum distance allowed between segment endpoints
+OSM_URL = "https://api.openstreetmap.org"  # OpenStreetMap API server
+SEGMENT_BYTES = 370  # Memory used by a loaded Segment (measured with tracemalloc)
+LINE_BYTES = 400  # Memory used by the line of a segment drawn by show_segments (measured, rounded up)
 
 def _get_data(region: Region) -> Data:
     """Download segments in the request region and save them to a list[segment{point, time - point,time}]"""
@@ -47,9 +53,7 @@ def _get_data(region: Region) -> Data:
     uncleaned_segments: Data = []
     while True:
         box = f"{region.bottom_left.lat},{region.bottom_left.lon},{region.top_right.lat},{region.top_right.lon}"
-        url = (
-            f"https://api.openstreetmap.org/api/0.6/trackpoints?bbox={box}&page={page}"
-        )
+        url = f"{OSM_URL}/api/0.6/trackpoints?bbox={box}&page={page}"
         response = requests.get(url)  # HTTP GET request to the URL
         gpx_content = response.content.decode("utf-8")
         gpx = gpxpy.parse(gpx_content)
@@ -120,17 +124,42 @@ def _load_segments(filename: str) -> Segments:
             segments.append(Segment(start, end))
     return segments
 
-def get_segments(region: Region, filename: str) -> Segments:
-    """Gets all segments from the given region.
-    If filename exists, load segments from the file 'filename'.
-    Oterwise, download segments in the box and save them to the file 'filename'."""
+def iter_segment_chunks(filename: str, chunk_size: int) -> Iterator[NDArray[np.float64]]:
+    """Read the segments of the file 'filename' in chunks of at most chunk_size segments.
+    Each chunk is an array with a row [start lat, start lon, end lat, end lon] per segment."""
+    with open(filename, "r") as file:
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                break
+            yield np.loadtxt(lines, delimiter=",", dtype=np.float64, ndmin=2)
+
+def iter_segments(filename: str, step: int = 1) -> Iterator[Segment]:
+    """Read one of every 'step' segments of the file 'filename' without loading the whole file."""
+    with open(filename, "r") as file:
+        for line in islice(file, 0, None, step):
+            data = line.strip().split(",")
+            yield Segment(Point(float(data[0]), float(data[1])), Point(float(data[2]), float(data[3])))
+
+def count_segments(filename: str) -> int:
+    """Count the segments of the file 'filename' without loading it."""
+    with open(filename, "r") as file:
+        return sum(1 for _ in file)
+
+def download_segments(region: Region, filename: str) -> None:
+    """If filename does not exist, download segments in the box and save them to the file 'filename'."""
     if not os.path.exists(filename):
         uncleaned_data = _get_data(region)  # Segments list
         _write_segments_to_file(uncleaned_data, filename)
 
+def get_segments(region: Region, filename: str) -> Segments:
+    """Gets all segments from the given region.
+    If filename exists, load segments from the file 'filename'.
+    Oterwise, download segments in the box and save them to the file 'filename'."""
+    download_segments(region, filename)
     return _load_segments(filename)
 
-def show_segments(segments: Segments, filename: str) -> None:
+def show_segments(segments: Iterable[Segment], filename: str) -> None:
     """Show all segments in a PNG file using staticmaps."""
     map = staticmap.StaticMap(800, 800)
     for segment in segments:
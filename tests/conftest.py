@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+from collections import Counter
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Iterator
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+import staticmap
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import monuments
+import segments
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+RECORDED_HOST = "https://www.catalunyamedieval.es"  # Host of the links in the recorded pages
+
+
+class StubServer:
+    """Local HTTP server replaying the recorded OpenStreetMap and Catalunya Medieval
+    responses, and serving blank map tiles. It counts the requests of every path."""
+
+    def __init__(self) -> None:
+        self.requests: Counter[str] = Counter()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_Handler, self))
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def __init__(self, stub: StubServer, *args, **kwargs) -> None:
+        self.stub = stub
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        self.stub.requests[url.path] += 1
+        if url.path == "/api/0.6/trackpoints":
+            page = parse_qs(url.query)["page"][0]
+            self._send(_read_fixture("osm", f"trackpoints_{page}.gpx")
+                       or _read_fixture("osm", "trackpoints_empty.gpx"), "application/gpx+xml")
+        elif url.path.startswith("/tiles/"):
+            self._send(_blank_tile(), "image/png")
+        else:
+            page = _read_fixture("catalunyamedieval", *url.path.strip("/").split("/"), "index.html")
+            if page is None:  # Categories without recorded monuments
+                page = b"<!DOCTYPE html>\n<html><body><ul class=\"llistat\"></ul></body></html>\n"
+            self._send(page.replace(RECORDED_HOST.encode(), self.stub.url.encode()), "text/html; charset=UTF-8")
+
+    def _send(self, body: bytes, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def _read_fixture(*path: str) -> bytes | None:
+    filename = os.path.join(FIXTURES, *path)
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, "rb") as file:
+        return file.read()
+
+
+def _blank_tile() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (256, 256), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="module")
+def stub_server() -> Iterator[StubServer]:
+    """Redirect every download of the program to a local stub server."""
+    stub = StubServer()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(segments, "OSM_URL", stub.url)
+        monkeypatch.setattr(monuments, "CATALUNYA_MEDIEVAL_URL", stub.url)
+        monkeypatch.setattr(staticmap, "StaticMap",
+                            partial(staticmap.StaticMap, url_template=stub.url + "/tiles/{z}/{x}/{y}.png"))
+        yield stub
+    stub.close()
@@ -0,0 +1,148 @@
+import tracemalloc
+from io import StringIO
+
+import numpy as np
+import pytest
+import staticmap
+from scipy.optimize import linear_sum_assignment
+from yogi import Yogi
+
+import main
+from graphmaker import make_graph, make_graph_out_of_core, _chunk_size
+from segments import SEGMENT_BYTES, Point, Region, count_segments, get_segments, iter_segment_chunks, iter_segments
+
+REGION = Region(Point(42.10, 2.40), Point(42.20, 2.55))
+START = Point(42.115, 2.415)
+CLUSTERS = 25
+BUDGET = 200 * 1024  # Much smaller than the segments, to use many chunks
+TOLERANCE = 0.1  # Relative difference allowed in the clustering inertia
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory) -> tuple[str, str]:
+    """Segments file with some random walks (sorted by walk, as downloaded) and a monuments file."""
+    workdir = tmp_path_factory.mktemp("out_of_core")
+    segments_file, monuments_file = str(workdir / "segments.txt"), str(workdir / "monuments.txt")
+    rng = np.random.default_rng(0)
+    with open(segments_file, "w") as file:
+        for _ in range(20):
+            lat, lon = rng.uniform(42.11, 42.19), rng.uniform(2.41, 2.54)
+            step = rng.uniform(-0.0003, 0.0003, size=2)
+            for _ in range(150):
+                file.write(f"{lat}, {lon}, {lat + step[0]}, {lon + step[1]}\n")
+                lat, lon = lat + step[0], lon + step[1]
+    with open(monuments_file, "w") as file:
+        file.write("1. Castell de Montagut – Montagut i Oix / Garrotxa, 42.182, 2.452\n")
+    return segments_file, monuments_file
+
+
+def _centroids(G) -> np.ndarray:
+    return np.array([G.nodes[num]["pos"] for num in range(CLUSTERS)])
+
+
+def _inertia(points: np.ndarray, G) -> float:
+    return float(((points[:, None, :] - _centroids(G)[None]) ** 2).sum(axis=2).min(axis=1).sum())
+
+
+def test_chunks_cover_the_file(files) -> None:
+    segments_file, _ = files
+    chunk_size = _chunk_size(BUDGET, CLUSTERS)
+    chunks = list(iter_segment_chunks(segments_file, chunk_size))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate(chunks), np.loadtxt(segments_file, delimiter=",", ndmin=2))
+
+
+def test_budget_too_small() -> None:
+    with pytest.raises(ValueError):
+        _chunk_size(1024, CLUSTERS)
+
+
+def test_matches_in_memory(files) -> None:
+    segments_file, monuments_file = files
+    segments = get_segments(REGION, segments_file)
+    G, _ = make_graph(segments, CLUSTERS, 10, REGION, START, monuments_file)
+    H, _ = make_graph_out_of_core(segments_file, CLUSTERS, 10, REGION, START, monuments_file, BUDGET)
+
+    points = np.loadtxt(segments_file, delimiter=",").reshape(-1, 2)
+    assert _inertia(points, H) <= _inertia(points, G) * (1 + TOLERANCE)
+    assert abs(H.number_of_edges() - G.number_of_edges()) <= TOLERANCE * G.number_of_edges()
+
+    # Pair every in-memory centroid with an out-of-core one: most of them are the same cluster,
+    # much closer to each other than to the neighbouring centroids
+    in_memory, out_of_core = _centroids(G), _centroids(H)
+    distances = np.linalg.norm(in_memory[:, None] - out_of_core[None], axis=2)
+    rows, columns = linear_sum_assignment(distances)
+    matched = distances[rows, columns]
+    spacing = np.sort(np.linalg.norm(in_memory[:, None] - in_memory[None], axis=2), axis=1)[:, 1].mean()
+    assert np.median(matched) <= spacing / 2
+    assert np.mean(matched <= spacing) >= 0.8
+
+
+def test_peak_memory_within_budget(files) -> None:
+    segments_file, monuments_file = files
+    # Loading the segments at once would need several times the budget
+    assert count_segments(segments_file) * SEGMENT_BYTES > 5 * BUDGET
+
+    tracemalloc.start()
+    try:
+        make_graph_out_of_core(segments_file, CLUSTERS, 10, REGION, START, monuments_file, BUDGET)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak <= BUDGET
+
+
+def test_out_of_core_decision(files) -> None:
+    segments_file, _ = files
+    count = count_segments(segments_file)
+    assert count == 3000
+    # Loading the segments needs several times the size of the file
+    assert main._out_of_core(count, 2 * count * 76)
+    assert not main._out_of_core(count, 100 * 1024 * 1024)
+
+
+def test_preview_fits_budget(files) -> None:
+    segments_file, _ = files
+    count = count_segments(segments_file)
+    step = main._preview_step(count, BUDGET)
+    assert step > 1
+
+    tracemalloc.start()
+    try:
+        m = staticmap.StaticMap(800, 800)
+        for segment in iter_segments(segments_file, step):
+            m.add_line(staticmap.Line([(segment.start.lon, segment.start.lat), (segment.end.lon, segment.end.lat)], "red", 2))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(m.lines) == len(range(0, count, step))
+    assert peak <= BUDGET
+
+
+def test_main_uses_budget(files, monkeypatch) -> None:
+    segments_file, monuments_file = files
+    budgets = []
+
+    def out_of_core(*args):
+        budgets.append(args[-1])
+        return make_graph_out_of_core(*args)
+
+    answers = f"42.10 2.40 42.20 2.55 {segments_file[:-4]} segments_map {monuments_file[:-4]} 25 10 42.115 2.415 routes"
+    monkeypatch.chdir(segments_file.rsplit("/", 1)[0])
+    monkeypatch.setattr(main, "read", Yogi(StringIO(answers)).read)
+    monkeypatch.setattr(main, "make_graph_out_of_core", out_of_core)
+    monkeypatch.setattr(main, "show_segments", lambda segments, filename: None)
+    monkeypatch.setattr(main, "get_segments", None)  # The segments must not be loaded at once
+    monkeypatch.setattr(main, "cached_routes", _stop)  # Routes are tested in test_pipeline
+    with pytest.raises(_Stop):
+        main.main(BUDGET)
+    assert budgets == [BUDGET]
+
+
+class _Stop(Exception):
+    pass
+
+
+def _stop(*args) -> None:
+    raise _Stop
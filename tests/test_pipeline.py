@@ -0,0 +1,180 @@
+"""Run the whole main pipeline offline and compare it with the golden outputs.
+
+The golden outputs and the performance baseline are in tests/golden. After an
+intended change of the results, or to use the timings of another machine,
+record them again with:
+
+    UPDATE_GOLDEN=1 python -m pytest tests
+
+Timings depend on the machine: SKIP_TIMING=1 checks only the peak memory.
+"""
+import json
+import os
+import re
+import time
+import tracemalloc
+from io import StringIO
+from typing import Any, Callable
+
+import networkx as nx
+import pytest
+from yogi import Yogi
+
+import main
+from routecache import ROUTE_CACHE
+from segments import Point
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+UPDATE = os.environ.get("UPDATE_GOLDEN") == "1"
+SKIP_TIMING = os.environ.get("SKIP_TIMING") == "1"
+
+# Answers to the questions of main: region, segments file, segments map,
+# monuments file, clusters, epsilon, starting point and maps file
+ANSWERS = "42.10 2.40 42.20 2.55 segments segments_map monuments 25 10 42.115 2.415 routes"
+
+STAGES = ["download_segments", "get_segments", "show_segments", "get_monuments", "make_graph",
+          "cached_routes", "print_routes"]
+
+TIME_FACTOR = 2.0  # A stage fails if it is this times slower than the baseline...
+TIME_SLACK = 0.25  # ... and also more than these seconds slower
+MEMORY_FACTOR = 1.25  # A stage fails if its peak memory is more than this times the baseline
+MEMORY_FLOOR = 4 * 1024  # plus these bytes (for the stages that use very little memory)
+
+
+def _measured(name: str, function: Callable, run: dict[str, Any]) -> Callable:
+    """Wrap a stage of the pipeline to record its result, time and peak memory."""
+    def stage(*args, **kwargs):
+        tracemalloc.reset_peak()
+        memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        run["seconds"][name] = time.perf_counter() - start
+        run["peak_bytes"][name] = tracemalloc.get_traced_memory()[1] - memory
+        run["results"][name] = result
+        return result
+    return stage
+
+
+@pytest.fixture(scope="module")
+def run(stub_server, tmp_path_factory) -> dict[str, Any]:
+    """Run main once answering ANSWERS, recording every stage."""
+    run: dict[str, Any] = {"seconds": {}, "peak_bytes": {}, "results": {}}
+    workdir = tmp_path_factory.mktemp("pipeline")
+    ROUTE_CACHE.clear()
+    cache_stats = ROUTE_CACHE.stats()
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(workdir)
+        monkeypatch.setattr(main, "read", Yogi(StringIO(ANSWERS)).read)
+        for name in STAGES:
+            monkeypatch.setattr(main, name, _measured(name, getattr(main, name), run))
+        tracemalloc.start()
+        try:
+            main.main()
+        finally:
+            tracemalloc.stop()
+    run["workdir"] = workdir
+    run["cache"] = {name: ROUTE_CACHE.stats()[name] - cache_stats[name] for name in cache_stats}
+    return run
+
+
+def _graph_to_json(G: nx.Graph) -> dict[str, list]:
+    """Nodes (name, type and rounded position) and edges of the graph, sorted."""
+    nodes = []
+    for node, data in G.nodes(data=True):
+        pos = data["pos"]
+        lat, lon = (pos.lat, pos.lon) if isinstance(pos, Point) else pos
+        nodes.append([str(node), data.get("type"), [round(float(lat), 6), round(float(lon), 6)]])
+    edges = [sorted([str(x), str(y)]) for x, y in G.edges()]
+    return {"nodes": sorted(nodes), "edges": sorted(edges)}
+
+
+def _normalize_kml(kml: str) -> str:
+    """Remove the ids generated by simplekml and round the coordinates."""
+    kml = re.sub(r' id="[^"]*"', "", kml)
+    kml = re.sub(r"<styleUrl>[^<]*</styleUrl>", "", kml)
+    return re.sub(r"-?\d+\.\d+", lambda number: f"{float(number.group()):.6f}", kml)
+
+
+def _check_golden(name: str, actual: Any) -> None:
+    """Compare the actual value with the golden file 'name' (or record it)."""
+    filename = os.path.join(GOLDEN, name)
+    if UPDATE:
+        os.makedirs(GOLDEN, exist_ok=True)
+        with open(filename, "w") as file:
+            json.dump(actual, file, indent=1, ensure_ascii=False)
+            file.write("\n")
+    with open(filename, "r") as file:
+        assert actual == json.load(file)
+
+
+def test_segments_file(run) -> None:
+    with open(run["workdir"] / "segments.txt", "r") as file:
+        lines = file.read().splitlines()
+    _check_golden("segments.json", {"count": len(lines), "first": lines[:5], "last": lines[-5:]})
+
+
+def test_monuments_file(run) -> None:
+    with open(run["workdir"] / "monuments.txt", "r") as file:
+        _check_golden("monuments.json", file.read().splitlines())
+
+
+def test_graph(run) -> None:
+    graph, selected_monuments = run["results"]["make_graph"]
+    _check_golden("graph.json", _graph_to_json(graph))
+    assert sorted(m.name for m in selected_monuments) == sorted(
+        n for n, data in graph.nodes(data=True) if data["type"] == "monument")
+
+
+def test_route_graph(run) -> None:
+    _check_golden("route_graph.json", _graph_to_json(run["results"]["cached_routes"].route_graph))
+
+
+def test_routes(run) -> None:
+    found = run["results"]["cached_routes"].routes
+    _check_golden("routes.json", [[monument.name, [str(node) for node in route]] for monument, route in found])
+
+
+def test_route_cache(run) -> None:
+    # The routes of the run are computed once and stored in the shared cache
+    assert run["cache"] == {"hits": 0, "misses": 1, "size": 1}
+
+
+def test_kml(run) -> None:
+    filename = os.path.join(GOLDEN, "routes.kml")
+    with open(run["workdir"] / "routes.kml", "r", encoding="utf-8") as file:
+        kml = file.read()
+    if UPDATE:
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write(kml)
+    with open(filename, "r", encoding="utf-8") as file:
+        assert _normalize_kml(kml) == _normalize_kml(file.read())
+
+
+def test_png_files(run) -> None:
+    for name in ["segments_map.png", "routes.png"]:
+        with open(run["workdir"] / name, "rb") as file:
+            assert file.read(8) == b"\x89PNG\r\n\x1a\n"
+
+
+def test_performance(run) -> None:
+    """Fail if any stage is slower or uses more memory than in the baseline."""
+    filename = os.path.join(GOLDEN, "baseline.json")
+    measured = {name: {"seconds": round(run["seconds"][name], 4), "peak_bytes": run["peak_bytes"][name]}
+                for name in STAGES}
+    if UPDATE:
+        with open(filename, "w") as file:
+            json.dump(measured, file, indent=1)
+            file.write("\n")
+    with open(filename, "r") as file:
+        baseline = json.load(file)
+
+    worse = []
+    for name in STAGES:
+        seconds, peak = measured[name]["seconds"], measured[name]["peak_bytes"]
+        base_seconds, base_peak = baseline[name]["seconds"], baseline[name]["peak_bytes"]
+        if not SKIP_TIMING and seconds > base_seconds * TIME_FACTOR and seconds > base_seconds + TIME_SLACK:
+            worse.append(f"{name}: {seconds:.3f} s (baseline {base_seconds:.3f} s)")
+        if peak > base_peak * MEMORY_FACTOR + MEMORY_FLOOR:
+            worse.append(f"{name}: {peak} bytes (baseline {base_peak} bytes)")
+    assert not worse, "Stages worse than the baseline:\n" + "\n".join(worse)
@@ -0,0 +1,76 @@
+"""Known quirks of the pipeline. They are pinned here so that they are only
+changed on purpose (and then these tests and the golden outputs are updated)."""
+import networkx as nx
+import staticmap
+from PIL import Image
+
+import viewer
+from graphmaker import make_graph, _simplify_graph
+from monuments import get_monuments
+from segments import Point, Region, Segment, Segment_to_clean, _valid_segment
+
+
+def test_segments_of_different_days_are_valid() -> None:
+    # _valid_segment compares t1 with itself, so only the distance is checked
+    segment = Segment_to_clean(Point(42.1, 2.4), 20150401, Point(42.1001, 2.4001), 20150402)
+    assert _valid_segment(segment)
+
+
+def test_make_graph_is_not_simplified(tmp_path) -> None:
+    # Three groups of points on a straight line: the middle one would be removed by _simplify_graph
+    lats = [42.10, 42.11, 42.12]
+    segments = [Segment(Point(lats[i], 2.4), Point(lats[i + 1], 2.4)) for i in range(2) for _ in range(5)]
+    monuments_file = tmp_path / "monuments.txt"
+    monuments_file.write_text("")
+    region = Region(Point(42.0, 2.3), Point(42.2, 2.5))
+
+    G, _ = make_graph(segments, 3, 10, region, Point(42.10, 2.4), str(monuments_file))
+    clusters = G.subgraph(n for n, data in G.nodes(data=True) if data["type"] == "others")
+    assert clusters.number_of_edges() == 2
+    assert _simplify_graph(clusters, 10).number_of_edges() == 1
+
+
+def test_kml_coordinates_are_sorted(tmp_path) -> None:
+    # Coordinates are written as (min, max), which is (lon, lat) only because lon < lat in Catalonia
+    G = nx.Graph()
+    G.add_node("start", pos=Point(42.1, 2.4), type="start")
+    G.add_node(0, pos=(42.2, 2.5), type="others")
+    G.add_edge("start", 0)
+    viewer.export_KML(G, str(tmp_path / "graph.kml"))
+    kml = (tmp_path / "graph.kml").read_text()
+    assert "<coordinates>2.4,42.1,0.0</coordinates>" in kml
+    assert "<coordinates>2.5,42.2,0.0</coordinates>" in kml
+    assert "<coordinates>2.4,42.1,0.0 2.5,42.2,0.0</coordinates>" in kml
+
+
+def test_png_line_coordinates_are_sorted(monkeypatch, tmp_path) -> None:
+    lines = []
+
+    class Map:
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+        def add_marker(self, marker) -> None:
+            pass
+
+        def add_line(self, line) -> None:
+            lines.append(line.coords)
+
+        def render(self, *args, **kwargs) -> Image.Image:
+            return Image.new("RGB", (1, 1))
+
+    monkeypatch.setattr(staticmap, "StaticMap", Map)
+    G = nx.Graph()
+    G.add_node("start", pos=Point(42.1, 2.4), type="start")
+    G.add_node(0, pos=(42.2, 2.5), type="others")
+    G.add_edge("start", 0)
+    viewer.export_PNG(G, str(tmp_path / "graph.png"), Region(Point(42.0, 2.3), Point(42.3, 2.6)))
+    assert lines == [[(2.4, 42.1), (2.5, 42.2)]]
+
+
+def test_monument_pages_are_downloaded_twice(stub_server, tmp_path) -> None:
+    # _download_monuments calls _get_lat_lon once for the latitude and once for the longitude
+    monuments = get_monuments(str(tmp_path / "monuments.txt"))
+    assert len(monuments) == 5
+    assert stub_server.requests["/castell-de-montagut/"] == 2
+    assert stub_server.requests["/sant-pere-de-la-roca/"] == 2
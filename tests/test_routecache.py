@@ -0,0 +1,140 @@
+from dataclasses import astuple
+
+import networkx as nx
+import pytest
+
+from monuments import Monument
+from routecache import RouteCache, cached_routes, _compute_routes
+from segments import Point, Region
+
+REGION = Region(Point(42.0, 2.3), Point(42.3, 2.6))
+OTHER_REGION = Region(Point(41.0, 1.3), Point(41.3, 1.6))
+MONUMENTS = [Monument("Castell", Point(42.2, 2.5))]
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _key(version: int, node: int, region: Region = REGION) -> tuple:
+    return (astuple(region), version, node, frozenset())
+
+
+def _graph(version: int, region: Region = REGION) -> nx.Graph:
+    """Path 0-1-2 with the monument next to node 2 and the start next to node 0."""
+    G = nx.Graph(version=version, region=astuple(region))
+    for num in range(3):
+        G.add_node(num, pos=(42.0 + 0.1 * num, 2.3 + 0.1 * num), type="others")
+    G.add_edges_from([(0, 1), (1, 2)])
+    G.add_node("Castell", pos=Point(42.2, 2.5), type="monument")
+    G.add_edge("Castell", 2)
+    G.add_node("start", pos=Point(42.0, 2.3), type="start")
+    G.add_edge("start", 0)
+    return G
+
+
+def test_lru_eviction() -> None:
+    cache = RouteCache(max_size=2)
+    cache.put(_key(1, 0), "a")
+    cache.put(_key(1, 1), "b")
+    assert cache.get(_key(1, 0)) == "a"
+    cache.put(_key(1, 2), "c")
+    assert cache.get(_key(1, 1)) is None
+    assert cache.get(_key(1, 0)) == "a"
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_ttl_expiration() -> None:
+    clock = Clock()
+    cache = RouteCache(ttl=10, clock=clock)
+    cache.put(_key(1, 0), "a")
+    clock.now = 10
+    assert cache.get(_key(1, 0)) == "a"
+    clock.now = 10.5
+    assert cache.get(_key(1, 0)) is None
+    assert len(cache) == 0
+
+
+def test_new_graph_version_invalidates() -> None:
+    cache = RouteCache()
+    cache.put(_key(1, 0), "a")
+    cache.put(_key(2, 0, OTHER_REGION), "b")
+    assert cache.get(_key(3, 0)) is None
+    assert cache.get(_key(1, 0)) is None
+    assert cache.get(_key(2, 0, OTHER_REGION)) == "b"
+    assert cache.stats() == {"hits": 1, "misses": 2, "size": 1}
+
+
+def test_older_version_does_not_invalidate() -> None:
+    cache = RouteCache()
+    cache.put(_key(2, 0), "new")
+    assert cache.get(_key(1, 0)) is None
+    assert cache.get(_key(2, 0)) == "new"
+
+
+def test_alternating_graphs() -> None:
+    cache = RouteCache()
+    cache.put(_key(1, 0), "a")
+    cache.put(_key(2, 0, OTHER_REGION), "b")
+    for _ in range(5):
+        assert cache.get(_key(1, 0)) == "a"
+        assert cache.get(_key(2, 0, OTHER_REGION)) == "b"
+    assert cache.stats() == {"hits": 10, "misses": 0, "size": 2}
+
+
+def test_invalid_size() -> None:
+    with pytest.raises(ValueError):
+        RouteCache(max_size=0)
+
+
+def test_cached_routes_snap_start(stub_server) -> None:
+    cache = RouteCache()
+    G = _graph(1)
+    first = cached_routes(G, Point(42.0, 2.3), MONUMENTS, cache)
+    second = cached_routes(G, Point(42.01, 2.31), MONUMENTS, cache)
+    assert second is not first and second.png == first.png
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+    assert [route for _, route in first.routes] == [[0, 1, 2]]
+    assert first.route_graph.nodes["start"]["pos"] == Point(42.0, 2.3)
+    assert first.png.startswith(b"\x89PNG") and first.kml.startswith(b"<?xml")
+
+    cached_routes(G, Point(42.1, 2.4), MONUMENTS, cache)
+    cached_routes(_graph(2), Point(42.0, 2.3), MONUMENTS, cache)
+    assert cache.stats() == {"hits": 1, "misses": 3, "size": 1}
+
+
+def test_cached_routes_alternating_graphs(stub_server) -> None:
+    cache = RouteCache()
+    G, H = _graph(1), _graph(2, OTHER_REGION)
+    for _ in range(3):
+        cached_routes(G, Point(42.0, 2.3), MONUMENTS, cache)
+        cached_routes(H, Point(42.0, 2.3), MONUMENTS, cache)
+    assert cache.stats() == {"hits": 4, "misses": 2, "size": 2}
+
+
+def test_cached_routes_returns_copies(stub_server) -> None:
+    cache = RouteCache()
+    G = _graph(1)
+    first = cached_routes(G, Point(42.0, 2.3), MONUMENTS, cache)
+    first.route_graph.remove_node(1)
+    first.route_graph.nodes["start"]["pos"].lat = 0.0
+    first.routes[0][1].clear()
+    second = cached_routes(G, Point(42.0, 2.3), MONUMENTS, cache)
+    assert 1 in second.route_graph
+    assert second.route_graph.nodes["start"]["pos"] == Point(42.0, 2.3)
+    assert [route for _, route in second.routes] == [[0, 1, 2]]
+
+
+def test_maps_are_centered_on_the_graph_region(stub_server) -> None:
+    cache = RouteCache()
+    G, H = _graph(1), _graph(2, OTHER_REGION)
+    first = cached_routes(G, Point(42.0, 2.3), MONUMENTS, cache)
+    other = cached_routes(H, Point(42.0, 2.3), MONUMENTS, cache)
+    # Same route graph, but each map is centered on the region of its graph
+    assert cache.stats() == {"hits": 0, "misses": 2, "size": 2}
+    assert other.png != first.png
+    assert other.png == _compute_routes(H, 0, MONUMENTS).png
@@ -1,11 +1,17 @@
 import networkx as nx
 import staticmap
+from io import BytesIO
 from segments import Region, Point
 import simplekml
 
 
 def export_PNG(graph: nx.Graph, filename: str, region: Region) -> None:
     '''Export the graph to a PNG file using staticmaps.'''
+    with open(filename, "wb") as file:
+        file.write(render_PNG(graph, region))
+
+def render_PNG(graph: nx.Graph, region: Region) -> bytes:
+    '''Render the graph as PNG bytes using staticmaps.'''
     map_center = _center_calc(region)
 
     m = staticmap.StaticMap(1024, 768)
@@ -47,7 +53,9 @@ def export_PNG(graph: nx.Graph, filename: str, region: Region) -> None:
         m.add_line(staticmap.Line([(start_x, start_y), (end_x, end_y)], 'blue', 3))  
         
     img = m.render(zoom=11, center=(map_center.lon, map_center.lat))  
-    img.save(filename)         
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
 
 def _center_calc(region: Region) -> Point:
     '''Calculate the center (average lat and lon) of the given region'''
@@ -57,6 +65,11 @@ def _center_calc(region: Region) -> Point:
 
 def export_KML(graph: nx.Graph, filename: str) -> None:
     """Export the graph to a KML file."""
+    with open(filename, "wb") as file:
+        file.write(render_KML(graph))
+
+def render_KML(graph: nx.Graph) -> bytes:
+    """Render the graph as KML bytes."""
     kml = simplekml.Kml()
     folder = kml.newfolder(name='Cultural Routes')
     for node, coord in graph.nodes(data=True):
@@ -90,5 +103,5 @@ def export_KML(graph: nx.Graph, filename: str) -> None:
             end = (end_coords.lon, end_coords.lat)  # Swap the order
         linestring = folder.newlinestring(coords=[start, end])
         linestring.style.linestyle.color = simplekml.Color.blue
-    kml.save(filename)
+    return kml.kml().encode("utf-8")
 